@@ -1,10 +1,41 @@
 import bpy
+import numpy as np
 from math import radians
 
+# -----------------------
+# Unit cube geometry (shared by every box-shaped part)
+# -----------------------
+# Built once at module scope; each object gets its own mesh datablock via
+# from_pydata so materials stay per-part, but no bpy.ops call is ever needed.
+UNIT_CUBE_VERTS = [
+    (-0.5, -0.5, -0.5),
+    (-0.5, -0.5, 0.5),
+    (-0.5, 0.5, -0.5),
+    (-0.5, 0.5, 0.5),
+    (0.5, -0.5, -0.5),
+    (0.5, -0.5, 0.5),
+    (0.5, 0.5, -0.5),
+    (0.5, 0.5, 0.5),
+]
+
+UNIT_CUBE_FACES = [
+    (0, 1, 3, 2),
+    (4, 6, 7, 5),
+    (0, 4, 5, 1),
+    (2, 3, 7, 6),
+    (0, 2, 6, 4),
+    (1, 5, 7, 3),
+]
+
 # -----------------------
 # Helper: Create Material
 # -----------------------
 def create_material(name, color, roughness=0.5):
+    # Reuse the existing datablock on re-runs — avoids "Wall.001" pile-up
+    # and a fresh node tree (shader recompile) per run
+    mat = bpy.data.materials.get(name)
+    if mat is not None:
+        return mat
     mat = bpy.data.materials.new(name)
     mat.use_nodes = True
     bsdf = mat.node_tree.nodes["Principled BSDF"]
@@ -13,99 +44,124 @@ def create_material(name, color, roughness=0.5):
     return mat
 
 # -----------------------
-# Materials
-# -----------------------
-wall_mat = create_material("Wall", (0.8, 0.7, 0.6), 0.9)
-roof_mat = create_material("Roof", (0.3, 0.05, 0.05), 0.4)
-door_mat = create_material("Door", (0.2, 0.1, 0.05), 0.6)
-glass_mat = create_material("Glass", (0.6, 0.8, 1.0), 0.05)
-
-glass_bsdf = glass_mat.node_tree.nodes["Principled BSDF"]
-glass_bsdf.inputs["Transmission"].default_value = 1
-glass_bsdf.inputs["Roughness"].default_value = 0.02
-
-# -----------------------
-# House Base (Walls)
-# -----------------------
-bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 1))
-walls = bpy.context.object
-walls.name = "Walls"
-walls.scale = (3, 4, 1.5)
-walls.data.materials.append(wall_mat)
-
-# Solidify modifier (thickness)
-solid = walls.modifiers.new(name="Solidify", type='SOLIDIFY')
-solid.thickness = 0.15
-
-# Smooth shading
-bpy.ops.object.shade_smooth()
-
-# -----------------------
-# Roof
-# -----------------------
-bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 3))
-roof = bpy.context.object
-roof.name = "Roof"
-roof.scale = (3.2, 4.2, 0.6)
-roof.rotation_euler[0] = radians(45)
-roof.data.materials.append(roof_mat)
-
-# Smooth shading
-bpy.ops.object.shade_smooth()
-
-# -----------------------
-# Door
-# -----------------------
-bpy.ops.mesh.primitive_cube_add(size=1, location=(0, -4.01, 0.9))
-door = bpy.context.object
-door.name = "Door"
-door.scale = (0.7, 0.1, 1.0)
-door.data.materials.append(door_mat)
-
-# Bevel modifier for realism
-bevel = door.modifiers.new(name="Bevel", type='BEVEL')
-bevel.width = 0.02
-bevel.segments = 3
-
-# Smooth shading
-bpy.ops.object.shade_smooth()
-
-# -----------------------
-# Windows
-# -----------------------
-window_positions = [
-    (-1.5, -4.01, 1.6),
-    (1.5, -4.01, 1.6),
-    (-1.5, 4.01, 1.6),
-    (1.5, 4.01, 1.6),
-]
-
-for i, pos in enumerate(window_positions):
-    bpy.ops.mesh.primitive_cube_add(size=1, location=pos)
-    win = bpy.context.object
-    win.name = f"Window_{i}"
-    win.scale = (0.6, 0.1, 0.5)
-    win.data.materials.append(glass_mat)
-    bpy.ops.object.shade_smooth()
-
-# -----------------------
-# Ground (Optional)
-# -----------------------
-bpy.ops.mesh.primitive_plane_add(size=20, location=(0, 0, -0.01))
-ground = bpy.context.object
-ground.name = "Ground"
-ground_mat = create_material("Ground", (0.2, 0.25, 0.2), 1.0)
-ground.data.materials.append(ground_mat)
-bpy.ops.object.shade_smooth()
-
-# -----------------------
-# CRITICAL: Select all mesh objects for BlenderLab export
-# -----------------------
-for obj in bpy.data.objects:
-    obj.select_set(False)
-
-for obj in bpy.data.objects:
-    if obj.type == 'MESH':
-        obj.select_set(True)
-
-print(f"✅ House created with {len([o for o in bpy.data.objects if o.type == 'MESH'])} mesh objects ready for export")
+# Helper: Create Cube (data API, no operators)
+# -----------------------
+def make_cube(name, location, scale, material):
+    """Build a smooth-shaded cube straight from bpy.data.
+
+    Avoids bpy.ops.mesh.primitive_cube_add / shade_smooth, so no depsgraph
+    update or undo push happens per object.
+    """
+    me = bpy.data.meshes.new(name)
+    me.from_pydata(UNIT_CUBE_VERTS, [], UNIT_CUBE_FACES)
+    me.polygons.foreach_set("use_smooth", [True] * len(me.polygons))
+    me.update()
+    me.materials.append(material)
+
+    obj = bpy.data.objects.new(name, me)
+    obj.location = location
+    obj.scale = scale
+    bpy.context.collection.objects.link(obj)
+    return obj
+
+# No undo pushes while we build; the previous value is restored in the
+# finally below so an interactive session keeps its history
+_prev_global_undo = bpy.context.preferences.edit.use_global_undo
+bpy.context.preferences.edit.use_global_undo = False
+
+try:
+    # -----------------------
+    # Materials
+    # -----------------------
+    wall_mat = create_material("Wall", (0.8, 0.7, 0.6), 0.9)
+    roof_mat = create_material("Roof", (0.3, 0.05, 0.05), 0.4)
+    door_mat = create_material("Door", (0.2, 0.1, 0.05), 0.6)
+    glass_mat = create_material("Glass", (0.6, 0.8, 1.0), 0.05)
+
+    glass_bsdf = glass_mat.node_tree.nodes["Principled BSDF"]
+    glass_bsdf.inputs["Transmission"].default_value = 1
+    glass_bsdf.inputs["Roughness"].default_value = 0.02
+
+    # -----------------------
+    # House Base (Walls)
+    # -----------------------
+    walls = make_cube("Walls", (0, 0, 1), (3, 4, 1.5), wall_mat)
+
+    # Solidify modifier (thickness)
+    solid = walls.modifiers.new(name="Solidify", type='SOLIDIFY')
+    solid.thickness = 0.15
+
+    # -----------------------
+    # Roof
+    # -----------------------
+    roof = make_cube("Roof", (0, 0, 3), (3.2, 4.2, 0.6), roof_mat)
+    roof.rotation_euler[0] = radians(45)
+
+    # -----------------------
+    # Door
+    # -----------------------
+    door = make_cube("Door", (0, -4.01, 0.9), (0.7, 0.1, 1.0), door_mat)
+
+    # Bevel modifier for realism
+    bevel = door.modifiers.new(name="Bevel", type='BEVEL')
+    bevel.width = 0.02
+    bevel.segments = 3
+
+    # -----------------------
+    # Windows
+    # -----------------------
+    window_positions = [
+        (-1.5, -4.01, 1.6),
+        (1.5, -4.01, 1.6),
+        (-1.5, 4.01, 1.6),
+        (1.5, 4.01, 1.6),
+    ]
+
+    # All four panes share one mesh datablock and one object: the glTF
+    # exporter then emits a single primitive instead of four vertex buffers
+    window_scale = np.array((0.6, 0.1, 0.5), dtype=np.float32)
+    win_verts = (np.asarray(UNIT_CUBE_VERTS, dtype=np.float32) * window_scale)[None, :, :] \
+        + np.asarray(window_positions, dtype=np.float32)[:, None, :]
+    win_faces = [tuple(v + 8 * i for v in face)
+                 for i in range(len(window_positions))
+                 for face in UNIT_CUBE_FACES]
+
+    windows_me = bpy.data.meshes.new("Windows")
+    windows_me.from_pydata([tuple(v) for v in win_verts.reshape(-1, 3)], [], win_faces)
+    windows_me.polygons.foreach_set("use_smooth", [True] * len(windows_me.polygons))
+    windows_me.update()
+    windows_me.materials.append(glass_mat)
+    windows = bpy.data.objects.new("Windows", windows_me)
+    bpy.context.collection.objects.link(windows)
+
+    # -----------------------
+    # Ground (Optional)
+    # -----------------------
+    ground_mat = create_material("Ground", (0.2, 0.25, 0.2), 1.0)
+    ground_me = bpy.data.meshes.new("Ground")
+    ground_me.from_pydata(
+        [(-10, -10, 0), (10, -10, 0), (10, 10, 0), (-10, 10, 0)],
+        [],
+        [(0, 1, 2, 3)],
+    )
+    ground_me.polygons.foreach_set("use_smooth", [True] * len(ground_me.polygons))
+    ground_me.update()
+    ground_me.materials.append(ground_mat)
+    ground = bpy.data.objects.new("Ground", ground_me)
+    ground.location = (0, 0, -0.01)
+    bpy.context.collection.objects.link(ground)
+
+    # -----------------------
+    # CRITICAL: Select all mesh objects for BlenderLab export
+    # -----------------------
+    # Single pass: one select_set per object instead of a deselect-all loop
+    # followed by a select-meshes loop
+    for obj in bpy.data.objects:
+        obj.select_set(obj.type == 'MESH')
+
+    # Single deferred depsgraph update for the whole build
+    bpy.context.view_layer.update()
+
+    print(f"✅ House created with {len([o for o in bpy.data.objects if o.type == 'MESH'])} mesh objects ready for export")
+finally:
+    bpy.context.preferences.edit.use_global_undo = _prev_global_undo
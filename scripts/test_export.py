@@ -14,8 +14,12 @@ print("=" * 70 + "\n")
 
 # Test 1: Clear scene
 print("✓ Test 1: Clearing default scene...")
-bpy.ops.object.select_all(action='SELECT')
-bpy.ops.object.delete(use_global=False, confirm=False)
+# Data API removal: skips the operator system (undo push + per-object
+# depsgraph updates)
+for obj in list(bpy.data.objects):
+    bpy.data.objects.remove(obj, do_unlink=True)
+for me in list(bpy.data.meshes):
+    bpy.data.meshes.remove(me)
 print("  → Scene cleared successfully\n")
 
 # Test 2: Create simple object
@@ -34,7 +38,8 @@ print()
 
 # Test 4: Apply smooth shading
 print("✓ Test 4: Applying smooth shading...")
-bpy.ops.object.shade_smooth()
+cube.data.polygons.foreach_set("use_smooth", [True] * len(cube.data.polygons))
+cube.data.update()
 print("  → Smooth shading applied\n")
 
 # Test 5: Create material
@@ -74,7 +79,10 @@ try:
         filepath=export_path,
         export_format='GLB',
         export_selected_only=False,
-        export_materials=True
+        export_materials=True,
+        # Diagnostic cube has no textures — skip image encoding (default
+        # settings would zlib-compress any embedded PNGs at level 9)
+        export_image_format='NONE'
     )
     
     if os.path.exists(export_path):